@@ -1,16 +1,32 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
+from aiohttp import web
 import asyncio
+import contextvars
 from datetime import datetime
+import hashlib
+import heapq
+import json
 import os
 from dotenv import load_dotenv
 import logging
+import math
 import mysql.connector
 from mysql.connector import Error
 import random
 import re
-from collections import defaultdict
+import shlex
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from omnipunk_common import (
+    SEND_PRIORITY_BULK, SEND_PRIORITY_MODERATION, VERIFY_REPLY_TIMEOUT,
+    AgeGate, PendingVerifications, TokenBucket, outbound, parse_gated_channel_ids, setup_logging,
+)
 
 # Load environment variables
 load_dotenv()
@@ -34,26 +50,213 @@ intents = discord.Intents.default()
 intents.members = True
 intents.message_content = True
 
+# Metrics. Command latency and outcomes, database time, event loop lag and
+# gateway latency are kept in memory and served in the Prometheus text format
+# on METRICS_HOST:METRICS_PORT/metrics.
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 9108))  # 0 disables the endpoint
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+class Metrics:
+    """Counters, gauges and histograms keyed by metric name and label set.
+
+    Only touched from the event loop, so no locking is needed.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self._types = {}
+        self._values = defaultdict(float)  # (name, labels) -> counter or gauge value
+        self._histograms = {}  # (name, labels) -> Histogram
+
+    def inc(self, name, value=1, **labels):
+        self._types[name] = 'counter'
+        self._values[(name, tuple(sorted(labels.items())))] += value
+
+    def set(self, name, value, **labels):
+        self._types[name] = 'gauge'
+        self._values[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, value, **labels):
+        self._types[name] = 'histogram'
+        key = (name, tuple(sorted(labels.items())))
+        if key not in self._histograms:
+            self._histograms[key] = Histogram(self.buckets)
+        self._histograms[key].observe(value)
+
+    @staticmethod
+    def _labels(labels, **extra):
+        pairs = list(labels) + list(extra.items())
+        if not pairs:
+            return ""
+        escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+        return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        for name, kind in sorted(self._types.items()):
+            lines.append(f"# TYPE {name} {kind}")
+            if kind != 'histogram':
+                for (metric, labels), value in sorted(self._values.items()):
+                    if metric == name:
+                        lines.append(f"{name}{self._labels(labels)} {value}")
+                continue
+            for (metric, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(histogram.bounds, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{self._labels(labels, le=bound)} {cumulative}")
+                lines.append(f"{name}_bucket{self._labels(labels, le='+Inf')} {histogram.count}")
+                lines.append(f"{name}_sum{self._labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{self._labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics(LATENCY_BUCKETS)
+
+# Seconds of database time spent on behalf of the running command. Set when a
+# command starts; run_db adds to it, so DB time can be told apart from the rest.
+command_db_seconds = contextvars.ContextVar('command_db_seconds', default=None)
+
+def start_command_timer():
+    """Begin timing a command in the current task and return its (start, DB time) pair."""
+    db_seconds = [0.0]
+    command_db_seconds.set(db_seconds)
+    return time.perf_counter(), db_seconds
+
+def record_command(kind, name, status, timer=None):
+    metrics.inc('omnipunk_commands_total', kind=kind, command=name, status=status)
+    if timer is not None:
+        started, db_seconds = timer
+        metrics.observe('omnipunk_command_duration_seconds', time.perf_counter() - started, kind=kind, command=name)
+        metrics.observe('omnipunk_command_db_seconds', db_seconds[0], kind=kind, command=name)
+
+class InstrumentedTree(app_commands.CommandTree):
+    """Command tree that times every slash command and counts its outcome."""
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.type is discord.InteractionType.application_command:
+            interaction.extras['timer'] = start_command_timer()
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        name = interaction.command.qualified_name if interaction.command else 'unknown'
+        status = 'check_failed' if isinstance(error, app_commands.CheckFailure) else 'error'
+        record_command('slash', name, status, interaction.extras.get('timer'))
+        await super().on_error(interaction, error)
+
 class MyBot(commands.Bot):
     def __init__(self):
-        super().__init__(command_prefix=commands.when_mentioned_or("./"), intents=intents)
+        super().__init__(command_prefix=commands.when_mentioned_or("./"), intents=intents, tree_cls=InstrumentedTree)
+        self.reconcile_task = None
+        self.loop_monitor_task = None
+        self.metrics_runner = None
 
     async def setup_hook(self):
-        await self.tree.sync()
-        print("Command tree synced!")
+        if not await run_db(run_migrations):
+            logging.error("Schema migrations did not complete; continuing with the existing schema")
+        await warm_underage_cache()
+        await pending_verifications.start()
+        self.add_dynamic_items(PollButton)
+        await poll_engine.start()
+        self.reconcile_task = asyncio.create_task(reconcile_periodically())
+        self.loop_monitor_task = asyncio.create_task(monitor_event_loop())
+        self.metrics_runner = await start_metrics_server()
+        await sync_command_tree(self.tree)
+
+    async def close(self):
+        for task in (self.reconcile_task, self.loop_monitor_task):
+            if task is not None:
+                task.cancel()
+        if self.metrics_runner is not None:
+            await self.metrics_runner.cleanup()
+        await pending_verifications.stop()
+        await poll_engine.stop()
+        await super().close()
+        db_executor.shutdown(wait=True)
+        db_pool.close_all()
 
 bot = MyBot()
 
-# Logging configuration
-logging.basicConfig(level=logging.INFO, 
-                    format='%(asctime)s - %(levelname)s - %(message)s',
-                    filename='bot.log')
+log_listener = setup_logging()
 
-console = logging.StreamHandler()
-console.setLevel(logging.INFO)
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-console.setFormatter(formatter)
-logging.getLogger('').addHandler(console)
+@bot.listen('on_app_command_completion')
+async def record_app_command(interaction, command):
+    record_command('slash', command.qualified_name, 'ok', interaction.extras.get('timer'))
+
+@bot.before_invoke
+async def start_prefix_command_timer(ctx):
+    ctx.metrics_timer = start_command_timer()
+
+@bot.listen('on_command_completion')
+async def record_prefix_command(ctx):
+    record_command('prefix', ctx.command.qualified_name, 'ok', getattr(ctx, 'metrics_timer', None))
+
+@bot.listen('on_command_error')
+async def record_prefix_command_error(ctx, error):
+    # Any on_command_error listener disables discord.py's default handler, so
+    # log unhandled errors here the way it would have
+    if not (ctx.command and ctx.command.has_error_handler()) and not (ctx.cog and ctx.cog.has_error_handler()):
+        logging.error(f"Ignoring exception in command {ctx.command}", exc_info=error)
+    if ctx.command is None:
+        return
+    status = 'check_failed' if isinstance(error, commands.CheckFailure) else 'error'
+    record_command('prefix', ctx.command.qualified_name, status, getattr(ctx, 'metrics_timer', None))
+
+async def monitor_event_loop(interval=1.0):
+    """Sample event loop lag and gateway latency once per interval."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - started - interval)
+        metrics.observe('omnipunk_event_loop_lag_seconds', lag)
+        if math.isfinite(bot.latency):
+            metrics.set('omnipunk_gateway_latency_seconds', bot.latency)
+
+async def handle_metrics(request):
+    for name, value in db_pool.stats().items():
+        metrics.set('omnipunk_db_pool', value, stat=name)
+    metrics.set('omnipunk_outbound_queue_depth', outbound.stats()['depth'])
+    metrics.set('omnipunk_pending_verifications', len(pending_verifications))
+    metrics.set('omnipunk_open_polls', len(poll_engine))
+    return web.Response(text=metrics.render(), content_type='text/plain', charset='utf-8',
+                        headers={'X-Content-Type-Options': 'nosniff'})
+
+async def start_metrics_server():
+    """Serve /metrics on METRICS_HOST:METRICS_PORT. Returns the runner, or None if disabled."""
+    if not METRICS_PORT:
+        return None
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, METRICS_HOST, METRICS_PORT).start()
+    except OSError as e:
+        logging.error(f"Metrics endpoint disabled: could not listen on {METRICS_HOST}:{METRICS_PORT}: {e}")
+        await runner.cleanup()
+        return None
+    logging.info(f"Metrics endpoint listening on {METRICS_HOST}:{METRICS_PORT}/metrics")
+    return runner
 
 ALLOWED_ROLE_IDS = [1191071898218549270, 1278866719384932374, 1191072430781894716]
 
@@ -89,6 +292,13 @@ DB_NAME = os.getenv('DB_NAME')
 if not all([DB_HOST, DB_USER, DB_PASSWORD, DB_NAME]):
     raise ValueError("Missing database connection information. Please check your .env file.")
 
+# Connection pool sizing. Every helper borrows from the pool instead of paying a
+# fresh TCP + auth handshake per query.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv('DB_POOL_ACQUIRE_TIMEOUT', 10))
+DB_POOL_IDLE_TIMEOUT = float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300))
+DB_POOL_PING_AFTER = float(os.getenv('DB_POOL_PING_AFTER', 30))
+
 def create_db_connection():
     try:
         connection = mysql.connector.connect(
@@ -96,90 +306,495 @@ def create_db_connection():
             port=DB_PORT,
             user=DB_USER,
             password=DB_PASSWORD,
-            database=DB_NAME
+            database=DB_NAME,
+            # Single statements commit on their own; multi-statement writes start a transaction
+            autocommit=True
         )
         return connection
     except Error as e:
         logging.error(f"Error connecting to MySQL database: {e}")
         return None
 
+class DBPool:
+    """Bounded, thread-safe pool of MySQL connections.
+
+    At most ``size`` connections exist at once. Connections idle for longer
+    than ``ping_after`` seconds are health checked before reuse, and closed
+    once they sit unused for longer than ``idle_timeout`` seconds. Callers
+    wait up to ``acquire_timeout`` seconds for a free slot.
+    """
+
+    def __init__(self, size, acquire_timeout, idle_timeout, ping_after):
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = []  # (connection, last_used) pairs, most recently used last
+        self._in_use = 0
+        self._counters = defaultdict(int)
+
+    def acquire(self):
+        """Borrow a healthy connection, or return None if none can be had."""
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            self._count('acquire_timeouts')
+            logging.error(f"Timed out after {self.acquire_timeout}s waiting for a database connection")
+            return None
+        self._count('acquire_wait_ms', int((time.monotonic() - started) * 1000))
+
+        self.reap_idle()
+        connection = None
+        while connection is None:
+            with self._lock:
+                if not self._idle:
+                    break
+                candidate, last_used = self._idle.pop()
+            # A connection used moments ago is almost certainly still alive; skip the round trip
+            if time.monotonic() - last_used < self.ping_after or self._is_healthy(candidate):
+                connection = candidate
+                self._count('reused')
+            else:
+                self._discard(candidate)
+                self._count('failed_health_checks')
+
+        if connection is None:
+            connection = create_db_connection()
+            if connection is None:
+                self._slots.release()
+                return None
+            self._count('created')
+
+        with self._lock:
+            self._in_use += 1
+        return connection
+
+    def release(self, connection):
+        """Return a connection to the pool, dropping it if it is no longer usable."""
+        try:
+            if connection.in_transaction:
+                # Never hand the next caller an open transaction or a stale snapshot
+                connection.rollback()
+            if connection.is_connected():
+                with self._lock:
+                    self._idle.append((connection, time.monotonic()))
+            else:
+                self._discard(connection)
+        except Error as e:
+            logging.warning(f"Discarding database connection after release failure: {e}")
+            self._discard(connection)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            if connection is not None:
+                self.release(connection)
+
+    def reap_idle(self):
+        """Close connections that have been idle longer than idle_timeout."""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            expired = [conn for conn, last_used in self._idle if last_used < cutoff]
+            self._idle = [(conn, last_used) for conn, last_used in self._idle if last_used >= cutoff]
+        for conn in expired:
+            self._discard(conn)
+            self._count('reaped')
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update(size=self.size, in_use=self._in_use, idle=len(self._idle))
+        return stats
+
+    def _is_healthy(self, connection):
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Error:
+            pass
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+db_pool = DBPool(DB_POOL_SIZE, DB_POOL_ACQUIRE_TIMEOUT, DB_POOL_IDLE_TIMEOUT, DB_POOL_PING_AFTER)
+
 def execute_db_query(query, params=None):
-    connection = create_db_connection()
-    if connection is None:
-        logging.error("Failed to create database connection")
-        return None
+    with db_pool.connection() as connection:
+        if connection is None:
+            logging.error("Failed to acquire database connection")
+            return None
 
+        try:
+            with connection.cursor(dictionary=True) as cursor:
+                cursor.execute(query, params or ())
+                if query.strip().upper().startswith('SELECT'):
+                    result = cursor.fetchall()
+                    logging.debug(f"Query executed successfully. Rows returned: {len(result)}", extra={'sample': True})
+                    return result
+                else:
+                    logging.debug(f"Query executed successfully. Rows affected: {cursor.rowcount}", extra={'sample': True})
+                    return cursor.rowcount
+        except Error as e:
+            logging.error(f"Database error: {e}")
+            return None
+
+# mysql.connector blocks, so all database work runs on a dedicated executor and
+# handlers await it instead of stalling the event loop (and gateway heartbeats).
+DB_WORKERS = int(os.getenv('DB_WORKERS', DB_POOL_SIZE))
+db_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix='omnipunk-db')
+db_dispatch_stats = defaultdict(float)
+
+async def run_db(func, *args):
+    """Run a blocking database function on the DB executor and await its result."""
+    submitted = time.monotonic()
+    started = None
+
+    def call():
+        nonlocal started
+        started = time.monotonic()
+        return func(*args)
+
+    status = 'error'
     try:
-        with connection.cursor(dictionary=True) as cursor:
-            cursor.execute(query, params or ())
-            if query.strip().upper().startswith('SELECT'):
-                result = cursor.fetchall()
-                logging.info(f"Query executed successfully. Rows returned: {len(result)}")
-                return result
-            else:
-                connection.commit()
-                logging.info(f"Query executed successfully. Rows affected: {cursor.rowcount}")
-                return cursor.rowcount
-    except Error as e:
-        logging.error(f"Database error: {e}")
-        return None
+        result = await asyncio.get_running_loop().run_in_executor(db_executor, call)
+        if result is not None:
+            status = 'ok'
+        return result
     finally:
-        if connection.is_connected():
-            connection.close()
+        finished = time.monotonic()
+        queue_wait = (started or finished) - submitted
+        metrics.observe('omnipunk_db_call_seconds', finished - submitted, function=func.__name__)
+        metrics.inc('omnipunk_db_calls_total', function=func.__name__, status=status)
+        db_seconds = command_db_seconds.get()
+        if db_seconds is not None:
+            db_seconds[0] += finished - submitted
+        db_dispatch_stats['calls'] += 1
+        db_dispatch_stats['queue_wait_seconds'] += queue_wait
+        db_dispatch_stats['total_seconds'] += finished - submitted
+        db_dispatch_stats['max_queue_wait_seconds'] = max(db_dispatch_stats['max_queue_wait_seconds'], queue_wait)
+
+async def db_query(query, params=None):
+    return await run_db(execute_db_query, query, params)
+
+def execute_db_many(query, rows):
+    """Run one statement for every row in a single transaction."""
+    if not rows:
+        return 0
+    with db_pool.connection() as connection:
+        if connection is None:
+            logging.error("Failed to acquire database connection")
+            return None
 
-def create_underage_users_table():
-    query = """
-    CREATE TABLE IF NOT EXISTS underage_users (
-        id VARCHAR(255) PRIMARY KEY,
-        name VARCHAR(255),
-        age INT,
-        account_creation DATETIME,
-        join_date DATETIME
-    )
-    """
-    result = execute_db_query(query)
-    if result is not None:
-        logging.info("underage_users table created or already exists")
-    else:
-        logging.error("Failed to create underage_users table")
+        try:
+            with connection.cursor() as cursor:
+                connection.start_transaction()
+                cursor.executemany(query, rows)
+                connection.commit()
+                logging.debug(f"Batch executed successfully. Rows affected: {cursor.rowcount}", extra={'sample': True})
+                return cursor.rowcount
+        except Error as e:
+            logging.error(f"Database error in batch: {e}")
+            return None
+
+async def db_query_many(query, rows):
+    return await run_db(execute_db_many, query, rows)
+
+# Versioned schema migrations. Each entry runs exactly once per database, in
+# order, and is recorded in schema_migrations. Append new versions; never edit
+# one that has shipped.
+MIGRATIONS = [
+    (1, "create underage_users", [
+        """
+        CREATE TABLE IF NOT EXISTS underage_users (
+            id VARCHAR(255) PRIMARY KEY,
+            name VARCHAR(255),
+            age INT,
+            account_creation DATETIME,
+            join_date DATETIME
+        )
+        """,
+    ]),
+    (2, "create verified_users", [
+        """
+        CREATE TABLE IF NOT EXISTS verified_users (
+            id VARCHAR(255) PRIMARY KEY,
+            age_status VARCHAR(16),
+            verified_at DATETIME
+        )
+        """,
+    ]),
+    (3, "create pending_verifications", [
+        """
+        CREATE TABLE IF NOT EXISTS pending_verifications (
+            user_id VARCHAR(255) PRIMARY KEY,
+            guild_id VARCHAR(255),
+            source VARCHAR(16),
+            deadline DOUBLE
+        )
+        """,
+    ]),
+    (4, "snowflake keys and lookup indexes", [
+        """
+        ALTER TABLE underage_users
+            MODIFY id BIGINT UNSIGNED NOT NULL,
+            ADD INDEX idx_underage_users_name (name),
+            ADD INDEX idx_underage_users_age_name (age, name),
+            ADD INDEX idx_underage_users_join_date (join_date)
+        """,
+        "ALTER TABLE verified_users MODIFY id BIGINT UNSIGNED NOT NULL",
+        """
+        ALTER TABLE pending_verifications
+            MODIFY user_id BIGINT UNSIGNED NOT NULL,
+            MODIFY guild_id BIGINT UNSIGNED NOT NULL
+        """,
+    ]),
+    (5, "create polls and poll_votes", [
+        """
+        CREATE TABLE IF NOT EXISTS polls (
+            message_id BIGINT UNSIGNED PRIMARY KEY,
+            channel_id BIGINT UNSIGNED NOT NULL,
+            guild_id BIGINT UNSIGNED NOT NULL,
+            author_id BIGINT UNSIGNED NOT NULL,
+            question VARCHAR(255) NOT NULL,
+            options TEXT NOT NULL,
+            created_at DATETIME NOT NULL,
+            closes_at DOUBLE NULL,
+            closed TINYINT(1) NOT NULL DEFAULT 0,
+            INDEX idx_polls_closed (closed)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS poll_votes (
+            message_id BIGINT UNSIGNED NOT NULL,
+            user_id BIGINT UNSIGNED NOT NULL,
+            option_index TINYINT UNSIGNED NOT NULL,
+            PRIMARY KEY (message_id, user_id)
+        )
+        """,
+    ]),
+    (6, "poll voting style", [
+        "ALTER TABLE polls ADD COLUMN style VARCHAR(16) NOT NULL DEFAULT 'reactions'",
+    ]),
+    (7, "create reports and report_reporters", [
+        """
+        CREATE TABLE IF NOT EXISTS reports (
+            id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+            reported_user_id BIGINT UNSIGNED NOT NULL,
+            reported_user_name VARCHAR(255),
+            message_id BIGINT UNSIGNED NULL,
+            channel_id BIGINT UNSIGNED NULL,
+            jump_url VARCHAR(255) NULL,
+            content TEXT NULL,
+            reason TEXT NOT NULL,
+            status VARCHAR(16) NOT NULL DEFAULT 'open',
+            report_count INT UNSIGNED NOT NULL DEFAULT 1,
+            handled_by BIGINT UNSIGNED NULL,
+            created_at DATETIME NOT NULL,
+            updated_at DATETIME NOT NULL,
+            UNIQUE KEY uniq_reports_message (message_id),
+            INDEX idx_reports_user_status (reported_user_id, status),
+            INDEX idx_reports_status (status)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS report_reporters (
+            report_id BIGINT UNSIGNED NOT NULL,
+            reporter_id BIGINT UNSIGNED NOT NULL,
+            reason TEXT NOT NULL,
+            reported_at DATETIME NOT NULL,
+            PRIMARY KEY (report_id, reporter_id),
+            INDEX idx_report_reporters_reporter (reporter_id)
+        )
+        """,
+    ]),
+]
 
-# Call this function when your bot starts up
-create_underage_users_table()
+def run_migrations():
+    """Apply every migration that has not been recorded yet. Returns True on success."""
+    with db_pool.connection() as connection:
+        if connection is None:
+            logging.error("Failed to acquire database connection for migrations")
+            return False
 
+        try:
+            with connection.cursor() as cursor:
+                # Serialise concurrent bot instances so each version runs once
+                cursor.execute("SELECT GET_LOCK('omnipunk_schema_migrations', 60)")
+                if cursor.fetchone()[0] != 1:
+                    logging.error("Timed out waiting for the schema migration lock")
+                    return False
+                try:
+                    cursor.execute("""
+                        CREATE TABLE IF NOT EXISTS schema_migrations (
+                            version INT PRIMARY KEY,
+                            description VARCHAR(255),
+                            applied_at DATETIME
+                        )
+                    """)
+                    cursor.execute("SELECT version FROM schema_migrations")
+                    applied = {row[0] for row in cursor.fetchall()}
+
+                    for version, description, statements in MIGRATIONS:
+                        if version in applied:
+                            continue
+                        for statement in statements:
+                            cursor.execute(statement)
+                        cursor.execute(
+                            "INSERT INTO schema_migrations (version, description, applied_at) VALUES (%s, %s, UTC_TIMESTAMP())",
+                            (version, description))
+                        connection.commit()
+                        logging.info(f"Applied schema migration {version}: {description}")
+                finally:
+                    cursor.execute("SELECT RELEASE_LOCK('omnipunk_schema_migrations')")
+                    cursor.fetchone()
+        except Error as e:
+            logging.error(f"Schema migration failed: {e}")
+            return False
+
+    return True
+
+# Underage status cache. Lookups gate channel access, so they are served from
+# memory and only fall back to MySQL on a miss or after the TTL runs out.
+UNDERAGE_CACHE_SIZE = int(os.getenv('UNDERAGE_CACHE_SIZE', 50000))
+UNDERAGE_CACHE_TTL = float(os.getenv('UNDERAGE_CACHE_TTL', 3600))
+
+class UnderageCache:
+    """LRU map of user id -> underage flag with per-entry TTL."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # user id -> (is_underage, expires_at)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id):
+        """Return the cached flag, or None if the user is unknown or expired."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        underage, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return underage
+
+    def set(self, user_id, underage):
+        self._entries[user_id] = (underage, time.monotonic() + self.ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id):
+        self._entries.pop(user_id, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+underage_cache = UnderageCache(UNDERAGE_CACHE_SIZE, UNDERAGE_CACHE_TTL)
+
+async def warm_underage_cache():
+    """Preload the cache with every recorded underage user."""
+    results = await db_query("SELECT id FROM underage_users LIMIT %s", (UNDERAGE_CACHE_SIZE,))
+    if results is None:
+        logging.error("Failed to warm underage cache")
+        return
+    for row in results:
+        underage_cache.set(int(row['id']), True)
+    logging.info(f"Underage cache warmed with {len(results)} users")
 
-def add_underage_user(user_id, name, age, account_creation, join_date):
-    # Convert ISO format strings to datetime objects
-    account_creation_dt = datetime.fromisoformat(account_creation.replace('+00:00', ''))
-    join_date_dt = datetime.fromisoformat(join_date.replace('+00:00', ''))
-    
-    # Format datetime objects to MySQL-compatible format
-    account_creation_formatted = account_creation_dt.strftime('%Y-%m-%d %H:%M:%S')
-    join_date_formatted = join_date_dt.strftime('%Y-%m-%d %H:%M:%S')
+def to_mysql_datetime(iso_string):
+    # Convert ISO format strings to a MySQL-compatible format
+    return datetime.fromisoformat(iso_string.replace('+00:00', '')).strftime('%Y-%m-%d %H:%M:%S')
 
-    query = """INSERT INTO underage_users 
+ADD_UNDERAGE_USER_QUERY = """INSERT INTO underage_users 
                (id, name, age, account_creation, join_date) 
                VALUES (%s, %s, %s, %s, %s)
                ON DUPLICATE KEY UPDATE 
-               name=%s, age=%s, account_creation=%s, join_date=%s"""
-    params = (str(user_id), name, age, account_creation_formatted, join_date_formatted,
-              name, age, account_creation_formatted, join_date_formatted)
-    result = execute_db_query(query, params)
+               name=VALUES(name), age=VALUES(age), account_creation=VALUES(account_creation), join_date=VALUES(join_date)"""
+
+def underage_user_params(user_id, name, age, account_creation, join_date):
+    account_creation_formatted = to_mysql_datetime(account_creation)
+    join_date_formatted = to_mysql_datetime(join_date)
+    return (int(user_id), name, age, account_creation_formatted, join_date_formatted)
+
+async def add_underage_user(user_id, name, age, account_creation, join_date):
+    params = underage_user_params(user_id, name, age, account_creation, join_date)
+    result = await db_query(ADD_UNDERAGE_USER_QUERY, params)
     if result is None or result == 0:
+        underage_cache.invalidate(int(user_id))
         logging.error(f"Failed to add underage user: {user_id}")
     else:
+        underage_cache.set(int(user_id), True)
         logging.info(f"Successfully added/updated underage user: {user_id}")
 
-def remove_underage_user(user_id):
+async def remove_underage_user(user_id):
     query = "DELETE FROM underage_users WHERE id = %s"
-    execute_db_query(query, (str(user_id),))
-
-def is_underage(user_id):
-    query = "SELECT * FROM underage_users WHERE id = %s"
-    result = execute_db_query(query, (str(user_id),))
-    return result is not None and len(result) > 0
-
-# Call this function when your bot starts up
-create_underage_users_table()
+    result = await db_query(query, (int(user_id),))
+    if result is None:
+        underage_cache.invalidate(int(user_id))
+    else:
+        underage_cache.set(int(user_id), False)
+    return result
+
+RECORD_VERIFICATION_QUERY = """INSERT INTO verified_users (id, age_status, verified_at)
+               VALUES (%s, %s, %s)
+               ON DUPLICATE KEY UPDATE age_status=VALUES(age_status), verified_at=VALUES(verified_at)"""
+
+def verification_params(user_id, age_status):
+    verified_at = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    return (int(user_id), age_status, verified_at)
+
+async def record_verification(user_id, age_status):
+    result = await db_query(RECORD_VERIFICATION_QUERY, verification_params(user_id, age_status))
+    if result is None:
+        logging.error(f"Failed to record verification for user: {user_id}")
+
+async def is_underage(user_id):
+    cached = underage_cache.get(int(user_id))
+    if cached is not None:
+        return cached
+
+    query = "SELECT id FROM underage_users WHERE id = %s"
+    result = await db_query(query, (int(user_id),))
+    if result is None:
+        return False
+    underage_cache.set(int(user_id), len(result) > 0)
+    return len(result) > 0
 
 @bot.tree.command(name="help")
 @app_commands.describe(command_name="The command to get help for")
@@ -196,9 +811,10 @@ async def help_command(interaction: discord.Interaction, command_name: str = Non
         `/kill`: Virtually kill another user
         `/repeat`: Repeat a message
         `/manualverify`: Manually verify a user's age (ADMIN ONLY)
+        `/verifysweep`: Send age verification to every unverified member (ADMIN ONLY)
         `/underage_list`: List underage users (ADMIN ONLY)
         `/announce`: Send an announcement (ADMIN ONLY)
-        `/snipe`: Show the last deleted message in the channel
+        `/snipe`: Show a recently deleted message in the channel
         """
         embed.add_field(name="User Commands", value=user_commands, inline=False)
     else:
@@ -215,16 +831,340 @@ async def help_command(interaction: discord.Interaction, command_name: str = Non
 
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
+POLL_EDIT_INTERVAL = float(os.getenv('POLL_EDIT_INTERVAL', 5))
+
+class Poll:
+    __slots__ = ('message_id', 'channel_id', 'question', 'options', 'closes_at', 'style', 'closed', 'votes', 'tallies')
+
+    def __init__(self, message_id, channel_id, question, options, closes_at=None, style='buttons', closed=False):
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.question = question
+        self.options = options
+        self.closes_at = closes_at
+        self.style = style
+        self.closed = closed
+        self.votes = {}  # user id -> option index
+        self.tallies = [0] * len(options)
+
+    def results(self):
+        """Return (option, votes) pairs, most votes first."""
+        return sorted(zip(self.options, self.tallies), key=lambda result: result[1], reverse=True)
+
+class PollEngine:
+    """Open polls and their vote tallies, kept in memory and mirrored to MySQL.
+
+    Votes arrive as raw reaction events and adjust the tallies in place, so
+    reading results never touches Discord. Each user holds at most one vote
+    per poll; voting again moves it. Vote changes are written in batches once
+    a second, and polls with a deadline are closed by the same background
+    task. Open polls and their votes are reloaded on startup.
+
+    Polls whose tallies changed are handed to on_change at most once every
+    render_interval seconds, so a burst of votes costs one message edit.
+    """
+
+    def __init__(self, load, save_votes, on_close, on_change, render_interval):
+        self._load = load
+        self._save_votes = save_votes
+        self._on_close = on_close
+        self._on_change = on_change
+        self._render_interval = render_interval
+        self._polls = {}
+        self._deadlines = []  # heap of (closes_at, message_id)
+        self._dirty = {}  # (message id, user id) -> option index, or None to delete
+        self._changed = set()
+        self._rendered = {}  # message id -> time of the last on_change call
+        self._task = None
+
+    def get(self, message_id):
+        return self._polls.get(message_id)
+
+    def __len__(self):
+        return len(self._polls)
+
+    def add(self, poll):
+        self._polls[poll.message_id] = poll
+        if poll.closes_at is not None:
+            heapq.heappush(self._deadlines, (poll.closes_at, poll.message_id))
+
+    def vote(self, message_id, user_id, option):
+        """Record user_id's vote and return the option it replaced, or None."""
+        poll = self._polls.get(message_id)
+        if poll is None or poll.closed or not 0 <= option < len(poll.options):
+            return None
+        previous = poll.votes.get(user_id)
+        if previous == option:
+            return None
+        if previous is not None:
+            poll.tallies[previous] -= 1
+        poll.votes[user_id] = option
+        poll.tallies[option] += 1
+        self._dirty[(message_id, user_id)] = option
+        self._changed.add(message_id)
+        return previous
+
+    def unvote(self, message_id, user_id, option):
+        """Withdraw user_id's vote if it is still for option."""
+        poll = self._polls.get(message_id)
+        if poll is None or poll.closed or poll.votes.get(user_id) != option:
+            return False
+        del poll.votes[user_id]
+        poll.tallies[option] -= 1
+        self._dirty[(message_id, user_id)] = None
+        self._changed.add(message_id)
+        return True
+
+    async def close(self, message_id):
+        poll = self._polls.pop(message_id, None)
+        if poll is None:
+            return None
+        self._changed.discard(message_id)
+        self._rendered.pop(message_id, None)
+        poll.closed = True
+        await self._flush()
+        await self._on_close(poll)
+        return poll
+
+    async def start(self):
+        if self._task is not None:
+            return
+        try:
+            for poll in await self._load():
+                self.add(poll)
+        except Exception as e:
+            logging.error(f"Failed to restore polls: {e}")
+        logging.info(f"Restored {len(self._polls)} open polls")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        await self._flush()
+
+    async def _flush(self):
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, {}
+        try:
+            await self._save_votes(dirty)
+        except Exception as e:
+            logging.error(f"Failed to persist poll votes: {e}")
+            for key, option in dirty.items():
+                self._dirty.setdefault(key, option)
+
+    async def _close_due(self, now):
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, message_id = heapq.heappop(self._deadlines)
+            await self.close(message_id)
+
+    def _render_changed(self, now):
+        for message_id in list(self._changed):
+            if now - self._rendered.get(message_id, 0) < self._render_interval:
+                continue
+            self._changed.discard(message_id)
+            self._rendered[message_id] = now
+            asyncio.create_task(self._on_change(self._polls[message_id]))
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(1)
+            await self._flush()
+            try:
+                await self._close_due(time.time())
+            except Exception as e:
+                logging.error(f"Error closing polls: {e}")
+            self._render_changed(time.monotonic())
+
+async def load_open_polls():
+    rows = await db_query("SELECT message_id, channel_id, question, options, closes_at, style FROM polls WHERE closed = 0")
+    if rows is None:
+        raise Error("Failed to load polls")
+    polls = {}
+    for row in rows:
+        polls[int(row['message_id'])] = Poll(int(row['message_id']), int(row['channel_id']), row['question'],
+                                              json.loads(row['options']), row['closes_at'], row['style'])
+    if polls:
+        votes = await db_query(
+            """SELECT v.message_id, v.user_id, v.option_index FROM poll_votes v
+               JOIN polls p ON p.message_id = v.message_id WHERE p.closed = 0""")
+        if votes is None:
+            raise Error("Failed to load poll votes")
+        for vote in votes:
+            poll = polls.get(int(vote['message_id']))
+            if poll is not None and vote['option_index'] < len(poll.options):
+                poll.votes[int(vote['user_id'])] = vote['option_index']
+                poll.tallies[vote['option_index']] += 1
+    return list(polls.values())
+
+async def save_poll_votes(dirty):
+    upserts = [(message_id, user_id, option)
+               for (message_id, user_id), option in dirty.items() if option is not None]
+    deletes = [(message_id, user_id)
+               for (message_id, user_id), option in dirty.items() if option is None]
+    upsert_query = """INSERT INTO poll_votes (message_id, user_id, option_index) VALUES (%s, %s, %s)
+                      ON DUPLICATE KEY UPDATE option_index=VALUES(option_index)"""
+    if await db_query_many(upsert_query, upserts) is None:
+        raise Error("Failed to save poll votes")
+    if await db_query_many("DELETE FROM poll_votes WHERE message_id = %s AND user_id = %s", deletes) is None:
+        raise Error("Failed to delete poll votes")
+
+def poll_results_embed(question, results, closed=False):
+    total = sum(count for _, count in results)
+    title = f"Final results for: {question}" if closed else f"Results for: {question}"
+    embed = discord.Embed(title=title, color=discord.Color.green())
+    for option, count in results:
+        share = f" ({count / total:.0%})" if total else ""
+        embed.add_field(name=option, value=f"{count} votes{share}", inline=False)
+    embed.set_footer(text=f"{total} votes in total")
+    return embed
+
+def poll_embed(poll):
+    """Render a button poll with its current tallies."""
+    embed = discord.Embed(title="📊 " + poll.question, color=discord.Color.blue())
+    embed.description = "\n".join(f"{POLL_EMOJIS[i]} {option} — **{count}**"
+                                  for i, (option, count) in enumerate(zip(poll.options, poll.tallies)))
+    total = sum(poll.tallies)
+    if poll.closed:
+        embed.set_footer(text=f"Poll closed | {total} votes")
+    elif poll.closes_at:
+        embed.set_footer(text=f"{total} votes | Voting closes")
+        embed.timestamp = datetime.fromtimestamp(poll.closes_at)
+    else:
+        embed.set_footer(text=f"{total} votes")
+    return embed
+
+def poll_partial_message(poll):
+    return bot.get_partial_messageable(poll.channel_id).get_partial_message(poll.message_id)
+
+async def render_poll(poll):
+    if poll.style != 'buttons':
+        return
+    try:
+        await poll_partial_message(poll).edit(embed=poll_embed(poll))
+    except discord.HTTPException as e:
+        logging.warning(f"Failed to update poll {poll.message_id}: {e}")
+
+async def announce_poll_closed(poll):
+    if await db_query("UPDATE polls SET closed = 1 WHERE message_id = %s", (poll.message_id,)) is None:
+        logging.error(f"Failed to mark poll {poll.message_id} as closed")
+    message = poll_partial_message(poll)
+    try:
+        if poll.style == 'buttons':
+            await message.edit(embed=poll_embed(poll), view=None)
+        await outbound.send(bot.get_partial_messageable(poll.channel_id), reference=message,
+                            embed=poll_results_embed(poll.question, poll.results(), closed=True))
+    except discord.HTTPException as e:
+        logging.error(f"Failed to post results for poll {poll.message_id}: {e}")
+
+poll_engine = PollEngine(load_open_polls, save_poll_votes, announce_poll_closed, render_poll, POLL_EDIT_INTERVAL)
+
+class PollButton(discord.ui.DynamicItem[discord.ui.Button], template=r'poll:(?P<option>[0-9]+)'):
+    """Vote button for one poll option. The poll is the message it is attached to,
+    so the buttons keep working after a restart without re-registering a view."""
+
+    def __init__(self, option, label=None):
+        super().__init__(discord.ui.Button(label=label, emoji=POLL_EMOJIS[option],
+                                           style=discord.ButtonStyle.secondary, custom_id=f'poll:{option}'))
+        self.option = option
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match['option']), item.label)
+
+    async def callback(self, interaction: discord.Interaction):
+        poll = poll_engine.get(interaction.message.id)
+        if poll is None or self.option >= len(poll.options):
+            await interaction.response.send_message("This poll is closed.", ephemeral=True)
+            return
+
+        option = poll.options[self.option]
+        if poll.votes.get(interaction.user.id) == self.option:
+            poll_engine.unvote(poll.message_id, interaction.user.id, self.option)
+            await interaction.response.send_message(f"Removed your vote for **{option}**.", ephemeral=True)
+        else:
+            poll_engine.vote(poll.message_id, interaction.user.id, self.option)
+            await interaction.response.send_message(f"You voted for **{option}**.", ephemeral=True)
+
+def poll_view(options):
+    view = discord.ui.View(timeout=None)
+    for i, option in enumerate(options):
+        view.add_item(PollButton(i, option[:80]))
+    return view
+
+async def fetch_stored_poll_results(message_id):
+    """Return (question, results, closed) for a poll stored in the database, or None."""
+    rows = await db_query("SELECT question, options, closed FROM polls WHERE message_id = %s", (message_id,))
+    if not rows:
+        return None
+    counts = await db_query(
+        "SELECT option_index, COUNT(*) AS votes FROM poll_votes WHERE message_id = %s GROUP BY option_index",
+        (message_id,))
+    if counts is None:
+        return None
+    options = json.loads(rows[0]['options'])
+    tallies = [0] * len(options)
+    for row in counts:
+        if row['option_index'] < len(options):
+            tallies[row['option_index']] = row['votes']
+    results = sorted(zip(options, tallies), key=lambda result: result[1], reverse=True)
+    return rows[0]['question'], results, bool(rows[0]['closed'])
+
+def poll_vote_option(payload):
+    """Map a reaction on an open poll to (poll, option index), or (None, None)."""
+    poll = poll_engine.get(payload.message_id)
+    if poll is None or poll.style != 'reactions' or payload.user_id == bot.user.id:
+        return None, None
+    emoji = str(payload.emoji)
+    if emoji not in POLL_EMOJIS[:len(poll.options)]:
+        return None, None
+    return poll, POLL_EMOJIS.index(emoji)
+
+@bot.event
+async def on_raw_reaction_add(payload):
+    poll, option = poll_vote_option(payload)
+    if poll is None:
+        return
+    previous = poll_engine.vote(poll.message_id, payload.user_id, option)
+    if previous is not None:
+        # One vote per user: take back the reaction for the option they left
+        message = bot.get_partial_messageable(poll.channel_id).get_partial_message(poll.message_id)
+        try:
+            await message.remove_reaction(POLL_EMOJIS[previous], discord.Object(id=payload.user_id))
+        except discord.HTTPException as e:
+            logging.warning(f"Failed to remove old vote on poll {poll.message_id}: {e}")
+
+@bot.event
+async def on_raw_reaction_remove(payload):
+    poll, option = poll_vote_option(payload)
+    if poll is not None:
+        poll_engine.unvote(poll.message_id, payload.user_id, option)
+
+def split_poll_options(options):
+    """Split poll options on whitespace, keeping double-quoted options together.
+    Apostrophes are left alone so options like "Don't" or "I'm in" still parse."""
+    lexer = shlex.shlex(options, posix=True)
+    lexer.quotes = '"'
+    lexer.commenters = ''
+    lexer.whitespace_split = True
+    return [option.strip() for option in lexer if option.strip()]
+
 @bot.tree.command(name="poll")
 @app_commands.describe(
     channel="The channel to create the poll in",
     question="The poll question",
-    options="The poll options (separate with spaces)"
+    options='The poll options, separated by spaces. Quote options with spaces: "Option one" "Option two"',
+    duration="Close the poll automatically after this many minutes"
 )
 @app_commands.checks.has_any_role('NeoPunkFM', 'NPFM Affiliate', 'Neo-Engineer')
-async def poll(interaction: discord.Interaction, channel: discord.TextChannel, question: str, options: str):
+async def poll(interaction: discord.Interaction, channel: discord.TextChannel, question: str, options: str,
+               duration: app_commands.Range[int, 1, 10080] = None):
     """Create a poll in the specified channel"""
-    option_list = options.split()
+    try:
+        option_list = split_poll_options(options)
+    except ValueError:
+        await interaction.response.send_message("Couldn't read the options. Check that every quote is closed.", ephemeral=True)
+        return
     if len(option_list) < 2:
         await interaction.response.send_message("You need at least two options for a poll!", ephemeral=True)
         return
@@ -232,16 +1172,24 @@ async def poll(interaction: discord.Interaction, channel: discord.TextChannel, q
         await interaction.response.send_message("You can only have up to 10 options in a poll!", ephemeral=True)
         return
 
-    embed = discord.Embed(title="📊 " + question, color=discord.Color.blue())
-    description = "\n".join(f"{POLL_EMOJIS[i]} {option}" for i, option in enumerate(option_list))
-    embed.description = description
-
-    poll_message = await channel.send("@everyone A new poll has been created!", embed=embed)
-
-    for i in range(len(option_list)):
-        await poll_message.add_reaction(POLL_EMOJIS[i])
+    await interaction.response.defer(ephemeral=True)
+    closes_at = time.time() + duration * 60 if duration else None
+    new_poll = Poll(0, channel.id, question, option_list, closes_at)
+    sent = await outbound.send(channel, "@everyone A new poll has been created!", embed=poll_embed(new_poll),
+                               view=poll_view(option_list))
+    new_poll.message_id = sent.id
+
+    stored = await db_query(
+        """INSERT INTO polls (message_id, channel_id, guild_id, author_id, question, options, created_at, closes_at, style)
+           VALUES (%s, %s, %s, %s, %s, %s, UTC_TIMESTAMP(), %s, %s)""",
+        (sent.id, channel.id, channel.guild.id, interaction.user.id, question[:255],
+         json.dumps(option_list), closes_at, new_poll.style))
+    if stored is None:
+        logging.error(f"Failed to store poll {sent.id}; votes will not be tracked")
+    else:
+        poll_engine.add(new_poll)
 
-    await interaction.response.send_message(f"Poll created in {channel.mention}!", ephemeral=True)
+    await interaction.followup.send(f"Poll created in {channel.mention}!", ephemeral=True)
 
 @bot.tree.command(name="pollresults")
 @app_commands.describe(
@@ -251,9 +1199,27 @@ async def poll(interaction: discord.Interaction, channel: discord.TextChannel, q
 @app_commands.checks.has_any_role('NeoPunkFM', 'NPFM Affiliate', 'Neo-Engineer')
 async def poll_results(interaction: discord.Interaction, message_id: str, channel: discord.TextChannel = None):
     """Display the results of a poll"""
+    try:
+        poll_id = int(message_id)
+    except ValueError:
+        await interaction.response.send_message("That isn't a valid message ID.", ephemeral=True)
+        return
+
+    poll = poll_engine.get(poll_id)
+    if poll is not None:
+        await interaction.response.send_message(embed=poll_results_embed(poll.question, poll.results()))
+        return
+
+    stored = await fetch_stored_poll_results(poll_id)
+    if stored is not None:
+        question, results, closed = stored
+        await interaction.response.send_message(embed=poll_results_embed(question, results, closed))
+        return
+
+    # Polls created before votes were stored can only be counted from their reactions
     channel = channel or interaction.channel
     try:
-        poll_message = await channel.fetch_message(int(message_id))
+        poll_message = await channel.fetch_message(poll_id)
     except discord.NotFound:
         await interaction.response.send_message("Couldn't find a message with that ID in the specified channel.", ephemeral=True)
         return
@@ -310,110 +1276,531 @@ async def repeat(interaction: discord.Interaction, message: str):
     """Repeats the user's message"""
     await interaction.response.send_message(message)
 
+async def load_pending_verifications():
+    rows = await db_query("SELECT user_id, guild_id, source, deadline FROM pending_verifications")
+    if rows is None:
+        raise Error("Failed to load pending verifications")
+    return [(int(row['user_id']), int(row['guild_id']), row['source'], row['deadline']) for row in rows]
+
+async def save_pending_verifications(upserts, deletes):
+    upsert_query = """INSERT INTO pending_verifications (user_id, guild_id, source, deadline)
+                      VALUES (%s, %s, %s, %s)
+                      ON DUPLICATE KEY UPDATE guild_id=VALUES(guild_id), source=VALUES(source), deadline=VALUES(deadline)"""
+    upsert_rows = [(e.user_id, e.guild_id, e.source, e.deadline) for e in upserts]
+    delete_rows = [(user_id,) for user_id in deletes]
+    if await db_query_many(upsert_query, upsert_rows) is None:
+        raise Error("Failed to save pending verifications")
+    if await db_query_many("DELETE FROM pending_verifications WHERE user_id = %s", delete_rows) is None:
+        raise Error("Failed to delete pending verifications")
+
+age_gate = AgeGate(parse_gated_channel_ids(ADULT_ONLY_CHANNEL_ID))
+
+async def apply_age_verification(member, age, age_status):
+    """Record a verified age and update the member's channel access."""
+    was_minor = await is_underage(member.id)
+
+    if age_status == "underage":
+        await add_underage_user(member.id, member.name, age, member.created_at.isoformat(), member.joined_at.isoformat())
+        await record_verification(member.id, age_status)
+        logging.info(f"Attempting to add underage user: {member.id}, {member.name}, {age}")
+        await outbound.send(member, f"Your age ({age}) has been recorded. As you are under 18, your access to certain channels will be restricted.", priority=SEND_PRIORITY_MODERATION)
+
+        await age_gate.apply(member, True, clear_overwrites=was_minor)
+        logging.info(f"Restricted gated channels for underage user: {member.id}")
+    else:
+        await remove_underage_user(member.id)
+        await record_verification(member.id, age_status)
+        await outbound.send(member, f"Your age ({age}) has been recorded. You have full access to the server.", priority=SEND_PRIORITY_MODERATION)
+
+        await age_gate.apply(member, False, clear_overwrites=was_minor)
+        logging.info(f"Removed gated channel restrictions for user: {member.id}")
+
+async def restored_verification_reply(entry, message):
+    guild = bot.get_guild(entry.guild_id)
+    member = guild.get_member(entry.user_id) if guild else None
+    if member is None:
+        return
+    try:
+        age, age_status = validate_age(message.content)
+        await apply_age_verification(member, age, age_status)
+        logging.info(f"User {member.id} verified as {age_status} after a restart ({entry.source})")
+    except ValueError as e:
+        await outbound.send(member, f"Age verification failed: {str(e)}", priority=SEND_PRIORITY_MODERATION)
+    except Exception as e:
+        await outbound.send(member, handle_error(e, "in restored verification"), priority=SEND_PRIORITY_MODERATION)
+
+async def restored_verification_timeout(entry):
+    user = bot.get_user(entry.user_id)
+    if user is not None:
+        try:
+            await outbound.send(user, "You took too long to respond. Please try again later.", priority=SEND_PRIORITY_MODERATION)
+        except discord.HTTPException:
+            pass
+
+pending_verifications = PendingVerifications(
+    load_pending_verifications,
+    save_pending_verifications,
+    restored_verification_reply,
+    restored_verification_timeout,
+)
+
+@bot.listen('on_message')
+async def dispatch_age_reply(message):
+    if message.author.bot or not isinstance(message.channel, discord.DMChannel):
+        return
+    pending_verifications.resolve(message)
+
 @bot.tree.command(name="manualverify")
 @app_commands.describe(member="The member to verify")
 @app_commands.checks.has_any_role('NeoPunkFM', 'NPFM Affiliate', 'Neo-Engineer')
 async def manualverify(interaction: discord.Interaction, member: discord.Member):
     """Sends the age verification to users who may not have had to do it"""
-    if is_underage(member.id):
+    if await is_underage(member.id):
         await interaction.response.send_message(f"{member.mention} is already verified as underage.", ephemeral=True)
         return
 
+    if member.id in pending_verifications:
+        await interaction.response.send_message(f"{member.mention} already has a verification in progress.", ephemeral=True)
+        return
+
     await interaction.response.send_message(f"Sending age verification to {member.mention}.", ephemeral=True)
 
+    reply = pending_verifications.register(member.id, member.guild.id, "manual", VERIFY_REPLY_TIMEOUT)
     try:
-        await member.send("Please enter your age to verify.")
-
-        def check(m):
-            return m.author == member and isinstance(m.channel, discord.DMChannel)
+        await outbound.send(member, "Please enter your age to verify.", priority=SEND_PRIORITY_MODERATION)
 
-        response = await bot.wait_for('message', timeout=60.0, check=check)
+        response = await reply
         age, age_status = validate_age(response.content)
 
-        account_creation = member.created_at.isoformat()
-        join_date = member.joined_at.isoformat()
-
-        adult_channel = interaction.guild.get_channel(ADULT_ONLY_CHANNEL_ID)
-
+        await apply_age_verification(member, age, age_status)
         if age_status == "underage":
-            add_underage_user(member.id, member.name, age, account_creation, join_date)
-            logging.info(f"Attempting to add underage user: {member.id}, {member.name}, {age}")
-            await member.send(f"Your age ({age}) has been recorded. As you are under 18, your access to certain channels will be restricted.")
             await interaction.followup.send(f"{member.mention} is now marked as underage.", ephemeral=True)
-            
-            if adult_channel:
-                await adult_channel.set_permissions(member, read_messages=False, send_messages=False)
-                logging.info(f"Restricted access to adult-only channel for underage user: {member.id}")
-            
             logging.info(f"User {member.id} manually verified as underage by {interaction.user.id}")
         else:
-            remove_underage_user(member.id)
-            await member.send(f"Your age ({age}) has been recorded. You have full access to the server.")
             await interaction.followup.send(f"{member.mention} is verified as not underage.", ephemeral=True)
-            
-            if adult_channel:
-                await adult_channel.set_permissions(member, overwrite=None)
-                logging.info(f"Removed restrictions from adult-only channel for user: {member.id}")
-            
             logging.info(f"User {member.id} manually verified as of age by {interaction.user.id}")
 
     except asyncio.TimeoutError:
-        await member.send("You took too long to respond. Please try again later.")
+        await outbound.send(member, "You took too long to respond. Please try again later.", priority=SEND_PRIORITY_MODERATION)
     except Exception as e:
         error_message = handle_error(e, "in manualverify command")
-        await member.send(error_message)
+        await outbound.send(member, error_message, priority=SEND_PRIORITY_MODERATION)
         await interaction.followup.send("An error occurred during verification. Please try again later.", ephemeral=True)
+    finally:
+        pending_verifications.discard(member.id, reply)
+
+SWEEP_DM_CONCURRENCY = int(os.getenv('SWEEP_DM_CONCURRENCY', 5))
+SWEEP_DM_INTERVAL = float(os.getenv('SWEEP_DM_INTERVAL', 1.0))
+SWEEP_REPLY_TIMEOUT = float(os.getenv('SWEEP_REPLY_TIMEOUT', 300))
+
+class DMThrottle:
+    """Caps concurrent DMs, spaces them out, and pauses every sender after a 429."""
+
+    def __init__(self, concurrency, interval):
+        self.interval = interval
+        self._slots = asyncio.Semaphore(concurrency)
+        self._resume_at = 0.0
+
+    async def send(self, member, content):
+        await self._slots.acquire()
+        try:
+            for attempt in range(2):
+                delay = self._resume_at - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    return await outbound.send(member, content, priority=SEND_PRIORITY_BULK)
+                except discord.HTTPException as e:
+                    if e.status != 429 or attempt:
+                        raise
+                    retry_after = float(e.response.headers.get('Retry-After', 5))
+                    self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
+                    logging.warning(f"DM rate limited, pausing sweep for {retry_after}s")
+        finally:
+            # Hold the slot for the spacing interval without delaying the caller
+            asyncio.get_running_loop().call_later(self.interval, self._slots.release)
+
+async def sweep_member(member, throttle, counts, results):
+    try:
+        await throttle.send(member, "Please enter your age to verify.")
+    except discord.HTTPException:
+        counts['dm_failed'] += 1
+        return
+
+    # The reply deadline starts once the prompt is delivered, not while it waits in the throttle
+    reply = pending_verifications.register(member.id, member.guild.id, "sweep", SWEEP_REPLY_TIMEOUT)
+    try:
+        try:
+            response = await reply
+        except asyncio.TimeoutError:
+            counts['timed_out'] += 1
+            await throttle.send(member, "You took too long to respond. Please try again later.")
+            return
+
+        try:
+            age, age_status = validate_age(response.content)
+        except ValueError as e:
+            counts['invalid'] += 1
+            await throttle.send(member, f"Age verification failed: {str(e)}")
+            return
+
+        counts[age_status] += 1
+        results.append((member, age, age_status))
+    except discord.HTTPException as e:
+        logging.warning(f"Failed to DM {member.id} during verification sweep: {e}")
+    finally:
+        pending_verifications.discard(member.id, reply)
+
+@bot.tree.command(name="verifysweep")
+@app_commands.checks.has_any_role('NeoPunkFM', 'NPFM Affiliate', 'Neo-Engineer')
+async def verifysweep(interaction: discord.Interaction):
+    """Sends the age verification to every member without a recorded verification"""
+    await interaction.response.defer(ephemeral=True, thinking=True)
+
+    verified = await db_query("SELECT id FROM verified_users UNION SELECT id FROM underage_users")
+    if verified is None:
+        await interaction.followup.send("Failed to load verified users. Please try again later.", ephemeral=True)
+        return
+
+    verified_ids = {int(row['id']) for row in verified}
+    targets = [m for m in interaction.guild.members
+               if not m.bot and m.id not in verified_ids and m.id not in pending_verifications]
+    if not targets:
+        await interaction.followup.send("Every member already has a recorded verification.", ephemeral=True)
+        return
+
+    await interaction.followup.send(f"Sending age verification to {len(targets)} members.", ephemeral=True)
+    logging.info(f"Verification sweep of {len(targets)} members started by {interaction.user.id}")
+
+    started = time.monotonic()
+    throttle = DMThrottle(SWEEP_DM_CONCURRENCY, SWEEP_DM_INTERVAL)
+    counts = defaultdict(int)
+    results = []
+    await asyncio.gather(*(sweep_member(member, throttle, counts, results) for member in targets))
+
+    underage_rows = [underage_user_params(member.id, member.name, age,
+                                          member.created_at.isoformat(), member.joined_at.isoformat())
+                     for member, age, age_status in results if age_status == "underage"]
+    underage_written = await db_query_many(ADD_UNDERAGE_USER_QUERY, underage_rows)
+    # A minor whose underage row failed stays unverified, so the next sweep asks again
+    recordable = [result for result in results if result[2] != "underage" or underage_written is not None]
+    verification_rows = [verification_params(member.id, age_status) for member, _, age_status in recordable]
+    verified_written = await db_query_many(RECORD_VERIFICATION_QUERY, verification_rows)
+    stored = [result for result in recordable if result[2] == "underage" or verified_written is not None]
+    stored_ids = {member.id for member, _, _ in stored}
+
+    for member, age, age_status in results:
+        if member.id not in stored_ids:
+            counts['write_failed'] += 1
+            underage_cache.invalidate(member.id)
+            try:
+                await throttle.send(member, "Your age couldn't be recorded right now. You may be asked again later.")
+            except discord.HTTPException as e:
+                logging.warning(f"Failed to DM {member.id} after a failed sweep write: {e}")
+            continue
+        underage_cache.set(member.id, age_status == "underage")
+        try:
+            await age_gate.apply(member, age_status == "underage")
+            if age_status == "underage":
+                await throttle.send(member, f"Your age ({age}) has been recorded. As you are under 18, your access to certain channels will be restricted.")
+            else:
+                await throttle.send(member, f"Your age ({age}) has been recorded. You have full access to the server.")
+        except discord.HTTPException as e:
+            logging.warning(f"Failed to finish verification for {member.id}: {e}")
+
+    embed = discord.Embed(title="Verification Sweep Complete", color=discord.Color.green())
+    embed.add_field(name="Members contacted", value=str(len(targets)), inline=True)
+    embed.add_field(name="Underage", value=str(counts['underage']), inline=True)
+    embed.add_field(name="Of age", value=str(counts['of_age']), inline=True)
+    embed.add_field(name="No reply", value=str(counts['timed_out']), inline=True)
+    embed.add_field(name="Invalid replies", value=str(counts['invalid']), inline=True)
+    embed.add_field(name="DMs closed/failed", value=str(counts['dm_failed']), inline=True)
+    if counts['write_failed']:
+        embed.add_field(name="Database writes failed", value=str(counts['write_failed']), inline=True)
+    embed.set_footer(text=f"Finished in {time.monotonic() - started:.0f}s")
+    logging.info(f"Verification sweep finished: {dict(counts)}")
+
+    try:
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    except discord.HTTPException:
+        # The interaction token expires after 15 minutes; fall back to a DM
+        await outbound.send(interaction.user, embed=embed)
+
+class KeysetPageView(discord.ui.View):
+    """Previous/next pager that fetches one page at a time.
+
+    fetch_page(after=, before=, limit=) must return rows in display order
+    (or None on error) using keyset conditions on the values produced by
+    key(row), so every page costs one bounded, indexed query.
+    """
+
+    def __init__(self, owner_id, fetch_page, key, render, page_size, timeout=300):
+        super().__init__(timeout=timeout)
+        self.owner_id = owner_id
+        self.fetch_page = fetch_page
+        self.key = key
+        self.render = render
+        self.page_size = page_size
+        self.page = 0
+        self.rows = []
+        self.message = None
+
+    async def load_first_page(self):
+        """Fetch the first page and return its embed, or None if the query failed."""
+        return await self._load(after=None)
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        return interaction.user.id == self.owner_id
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+    async def _load(self, after=None, before=None):
+        if before is not None:
+            rows = await self.fetch_page(after=None, before=before, limit=self.page_size)
+            has_next = True
+        else:
+            rows = await self.fetch_page(after=after, before=None, limit=self.page_size + 1)
+            has_next = rows is not None and len(rows) > self.page_size
+        if rows is None:
+            return None
+        self.rows = rows[:self.page_size]
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = not has_next
+        return self.render(self.rows, self.page)
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn(interaction, -1, before=self.key(self.rows[0]))
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn(interaction, 1, after=self.key(self.rows[-1]))
+
+    async def _turn(self, interaction, step, **cursor):
+        self.page += step
+        embed = await self._load(**cursor)
+        if embed is None:
+            self.page -= step
+            await interaction.response.send_message("Failed to load that page. Please try again later.", ephemeral=True)
+            return
+        await interaction.response.edit_message(embed=embed, view=self)
+
+UNDERAGE_PAGE_SIZE = 20
+
+async def fetch_underage_page(age=None, after=None, before=None, limit=UNDERAGE_PAGE_SIZE):
+    """Fetch a page of underage users ordered by (name, id) using keyset pagination."""
+    conditions, params = [], []
+    if age is not None:
+        conditions.append("age = %s")
+        params.append(age)
+    if after is not None:
+        conditions.append("(name > %s OR (name = %s AND id > %s))")
+        params.extend([after[0], after[0], after[1]])
+    if before is not None:
+        conditions.append("(name < %s OR (name = %s AND id < %s))")
+        params.extend([before[0], before[0], before[1]])
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    order = "DESC" if before is not None else "ASC"
+    query = f"SELECT id, name, age FROM underage_users {where} ORDER BY name {order}, id {order} LIMIT %s"
+    params.append(limit)
+
+    results = await db_query(query, tuple(params))
+    if results is not None and before is not None:
+        results.reverse()
+    return results
 
 @bot.tree.command()
+@app_commands.describe(age="Only list users of this age")
 @app_commands.checks.has_any_role('NeoPunkFM', 'NPFM Affiliate', 'Neo-Engineer')
-async def underage_list(interaction: discord.Interaction):
+async def underage_list(interaction: discord.Interaction, age: app_commands.Range[int, 0, 17] = None):
     """Retrieve and display a list of underage users from the database."""
-    query = "SELECT id, name, age FROM underage_users ORDER BY name"
-    results = execute_db_query(query)
+    if age is None:
+        count = await db_query("SELECT COUNT(*) AS total FROM underage_users")
+    else:
+        count = await db_query("SELECT COUNT(*) AS total FROM underage_users WHERE age = %s", (age,))
 
-    if results is None:
+    if count is None:
         await interaction.response.send_message("Failed to retrieve underage users. Please try again later.", ephemeral=True)
         return
 
-    if not results:
+    total = count[0]['total']
+    if not total:
         await interaction.response.send_message("No underage users found in the database.", ephemeral=True)
         return
 
-    embed = discord.Embed(title="Underage Users List", color=discord.Color.blue())
-    embed.set_footer(text=f"Total underage users: {len(results)}")
+    title = "Underage Users List" if age is None else f"Underage Users List (age {age})"
+    pages = -(-total // UNDERAGE_PAGE_SIZE)
 
-    chunks = [results[i:i + 25] for i in range(0, len(results), 25)]
+    def render(rows, page):
+        embed = discord.Embed(title=title, color=discord.Color.blue())
+        embed.description = "\n".join(f"**{user['name']}** (ID: {user['id']}, Age: {user['age']})" for user in rows)
+        embed.set_footer(text=f"Page {page + 1}/{pages} | Total underage users: {total}")
+        return embed
 
-    for i, chunk in enumerate(chunks):
-        field_value = "\n".join([f"**{user['name']}** (ID: {user['id']}, Age: {user['age']})" for user in chunk])
-        embed.add_field(name=f"Users {i*25+1}-{i*25+len(chunk)}", value=field_value, inline=False)
+    async def fetch_page(after, before, limit):
+        return await fetch_underage_page(age, after=after, before=before, limit=limit)
 
-    await interaction.response.send_message(embed=embed, ephemeral=True)
+    view = KeysetPageView(interaction.user.id, fetch_page, lambda user: (user['name'], user['id']),
+                          render, UNDERAGE_PAGE_SIZE)
+    embed = await view.load_first_page()
+    if embed is None:
+        await interaction.response.send_message("Failed to retrieve underage users. Please try again later.", ephemeral=True)
+        return
 
-last_deleted_messages = defaultdict(lambda: None)
+    await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+    view.message = await interaction.original_response()
+
+# Deleted messages kept for /snipe: a small ring buffer per channel holding only
+# the fields the embed renders, with age expiry and a global memory cap.
+SNIPE_DEPTH = int(os.getenv('SNIPE_DEPTH', 10))
+SNIPE_MAX_AGE = float(os.getenv('SNIPE_MAX_AGE', 3600))
+SNIPE_MEMORY_LIMIT = int(os.getenv('SNIPE_MEMORY_LIMIT', 5 * 1024 * 1024))
+
+class SnipedMessage:
+    __slots__ = ('author_name', 'avatar_url', 'content', 'created_at', 'deleted_at', 'size')
+
+    def __init__(self, author_name, avatar_url, content, created_at):
+        self.author_name = author_name
+        self.avatar_url = avatar_url
+        self.content = content
+        self.created_at = created_at
+        self.deleted_at = time.monotonic()
+        self.size = (sys.getsizeof(self) + sys.getsizeof(author_name)
+                     + sys.getsizeof(avatar_url) + sys.getsizeof(content))
+
+class SnipeBuffer:
+    """Per-channel deques of SnipedMessage, newest last."""
+
+    def __init__(self, depth, max_age, memory_limit):
+        self.depth = depth
+        self.max_age = max_age
+        self.memory_limit = memory_limit
+        self.memory_used = 0
+        self._channels = {}
+
+    def add(self, channel_id, record):
+        buffer = self._channels.setdefault(channel_id, deque())
+        buffer.append(record)
+        self.memory_used += record.size
+        while len(buffer) > self.depth:
+            self.memory_used -= buffer.popleft().size
+        self._expire(channel_id)
+        while self.memory_used > self.memory_limit and self._evict_oldest():
+            pass
+
+    def get(self, channel_id, index=1):
+        """Return the index-th most recent deletion (1 = newest) and the number stored."""
+        self._expire(channel_id)
+        buffer = self._channels.get(channel_id)
+        if not buffer or index > len(buffer):
+            return None, len(buffer or ())
+        return buffer[-index], len(buffer)
+
+    def _expire(self, channel_id):
+        buffer = self._channels.get(channel_id)
+        cutoff = time.monotonic() - self.max_age
+        while buffer and buffer[0].deleted_at < cutoff:
+            self.memory_used -= buffer.popleft().size
+        if buffer is not None and not buffer:
+            del self._channels[channel_id]
+
+    def _evict_oldest(self):
+        if not self._channels:
+            return False
+        channel_id = min(self._channels, key=lambda cid: self._channels[cid][0].deleted_at)
+        buffer = self._channels[channel_id]
+        self.memory_used -= buffer.popleft().size
+        if not buffer:
+            del self._channels[channel_id]
+        return True
+
+snipe_buffer = SnipeBuffer(SNIPE_DEPTH, SNIPE_MAX_AGE, SNIPE_MEMORY_LIMIT)
 
 @bot.event
 async def on_message_delete(message):
-    last_deleted_messages[message.channel.id] = message
-    print(f"Message deleted in channel {message.channel.id}: {message.content}")
-
-@bot.tree.command(name="snipe", description="Show the last deleted message in the channel")
-async def snipe(interaction: discord.Interaction):
-    """Show the last deleted message in the channel."""
-    deleted_message = last_deleted_messages.get(interaction.channel.id)
+    snipe_buffer.add(message.channel.id, SnipedMessage(
+        message.author.name,
+        message.author.display_avatar.url,
+        message.content,
+        message.created_at,
+    ))
+
+@bot.tree.command(name="snipe", description="Show a recently deleted message in the channel")
+@app_commands.describe(index="Which deletion to show, 1 being the most recent")
+async def snipe(interaction: discord.Interaction, index: app_commands.Range[int, 1, SNIPE_DEPTH] = 1):
+    """Show a recently deleted message in the channel."""
+    deleted_message, stored = snipe_buffer.get(interaction.channel.id, index)
     if deleted_message:
         embed = discord.Embed(description=deleted_message.content, color=discord.Color.red())
-        embed.set_author(name=deleted_message.author.name, icon_url=deleted_message.author.display_avatar.url)
+        embed.set_author(name=deleted_message.author_name, icon_url=deleted_message.avatar_url)
         embed.timestamp = deleted_message.created_at
+        embed.set_footer(text=f"Deleted message {index} of {stored}")
         await interaction.response.send_message(embed=embed)
+    elif stored:
+        await interaction.response.send_message(f"Only {stored} deleted messages are stored for this channel.", ephemeral=True)
     else:
         await interaction.response.send_message("No recently deleted messages found in this channel.")
 
+# Command tree sync. Syncing is a rate-limited REST call, so startup only syncs
+# when the fingerprint of the registered commands differs from the last sync.
+# Commands are synced globally, or only to COMMAND_SYNC_GUILD_ID when it is set
+# (guild commands update instantly, which suits testing).
+COMMAND_SYNC_GUILD_ID = int(os.getenv('COMMAND_SYNC_GUILD_ID', 0))
+COMMAND_HASH_FILE = os.getenv('COMMAND_HASH_FILE', 'command_tree.json')
+
+def command_tree_fingerprint(tree, guild=None):
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+                     key=lambda command: (command.get('type', 1), command['name']))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+def load_command_hashes():
+    try:
+        with open(COMMAND_HASH_FILE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable {COMMAND_HASH_FILE}: {e}")
+        return {}
+
+def save_command_hashes(hashes):
+    tmp_path = f"{COMMAND_HASH_FILE}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(hashes, f)
+    os.replace(tmp_path, COMMAND_HASH_FILE)
+
+async def sync_command_tree(tree, force=False):
+    """Sync the command tree if it changed. Returns the synced commands, or None if skipped."""
+    guild = discord.Object(id=COMMAND_SYNC_GUILD_ID) if COMMAND_SYNC_GUILD_ID else None
+    if guild is not None:
+        tree.copy_global_to(guild=guild)
+    scope = f'guild:{guild.id}' if guild else 'global'
+
+    hashes = await asyncio.to_thread(load_command_hashes)
+    fingerprint = command_tree_fingerprint(tree, guild)
+    if not force and hashes.get(scope) == fingerprint:
+        logging.info(f"Command tree unchanged for {scope}; skipping sync")
+        return None
+
+    synced = await tree.sync(guild=guild)
+    hashes[scope] = fingerprint
+    await asyncio.to_thread(save_command_hashes, hashes)
+    logging.info(f"Synced {len(synced)} commands for {scope}")
+    return synced
+
 # Sync command
 @bot.command()
 @commands.is_owner()
 async def sync(ctx):
-    synced = await bot.tree.sync()
+    synced = await sync_command_tree(bot.tree, force=True)
     await ctx.send(f"Synced {len(synced)} commands.")
 
 @bot.tree.command()
@@ -424,6 +1811,8 @@ async def sync(ctx):
 )
 async def announce(interaction: discord.Interaction, channel: discord.TextChannel, message: str):
     """Sends an announcement to the specified channel"""
+    # The outbound queue may hold the send past the 3 second response window
+    await interaction.response.defer(ephemeral=True)
     try:
         # Create an embed for the announcement
         embed = discord.Embed(
@@ -438,13 +1827,13 @@ async def announce(interaction: discord.Interaction, channel: discord.TextChanne
         embed.set_footer(text=f"Announcement by {interaction.user.display_name}", icon_url=interaction.user.display_avatar.url)
 
         # Send the embed
-        await channel.send(embed=embed)
-        await interaction.response.send_message(f"Announcement sent to {channel.mention}", ephemeral=True)
+        await outbound.send(channel, embed=embed)
+        await interaction.followup.send(f"Announcement sent to {channel.mention}", ephemeral=True)
         
     except discord.Forbidden:
-        await interaction.response.send_message("I don't have permission to send messages in that channel.", ephemeral=True)
+        await interaction.followup.send("I don't have permission to send messages in that channel.", ephemeral=True)
     except Exception as e:
-        await interaction.response.send_message(f"An error occurred: {str(e)}", ephemeral=True)
+        await interaction.followup.send(f"An error occurred: {str(e)}", ephemeral=True)
 
 PUNCH_IMAGES = [
     "https://gifdb.com/images/high/kasumi-nakasu-love-live-punching-aemy2k35e12ripji.webp",
@@ -457,6 +1846,57 @@ POLL_EMOJIS = ['1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣',
 # Get Guild ID from .env file
 GUILD_ID = int(os.getenv('GUILD_ID'))
 
+REPORT_STATUSES = ['open', 'reviewing', 'resolved', 'dismissed']
+REPORT_CLOSED_STATUSES = ('resolved', 'dismissed')
+REPORT_PAGE_SIZE = 10
+
+def store_report(reporter_id, user_id, user_name, reason, message_id=None, channel_id=None, jump_url=None, content=None):
+    """Record a report, folding repeat reports of the same message into one row.
+
+    Returns (report id, report count, created, reopened) or None on error. Each
+    reporter is counted once per report, however many times they submit it. A
+    report on a message whose report was already closed reopens it.
+    """
+    with db_pool.connection() as connection:
+        if connection is None:
+            logging.error("Failed to acquire database connection")
+            return None
+
+        try:
+            with connection.cursor() as cursor:
+                connection.start_transaction()
+                reopened = False
+                if message_id is not None:
+                    cursor.execute("SELECT status FROM reports WHERE message_id = %s FOR UPDATE", (message_id,))
+                    row = cursor.fetchone()
+                    reopened = row is not None and row[0] in REPORT_CLOSED_STATUSES
+                # LAST_INSERT_ID(id) makes lastrowid the existing row's id on a duplicate
+                cursor.execute(
+                    """INSERT INTO reports (reported_user_id, reported_user_name, message_id, channel_id, jump_url,
+                                          content, reason, created_at, updated_at)
+                       VALUES (%s, %s, %s, %s, %s, %s, %s, UTC_TIMESTAMP(), UTC_TIMESTAMP())
+                       ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id), updated_at = UTC_TIMESTAMP()""",
+                    (user_id, user_name, message_id, channel_id, jump_url, content, reason))
+                report_id = cursor.lastrowid
+                created = cursor.rowcount == 1
+
+                cursor.execute(
+                    """INSERT IGNORE INTO report_reporters (report_id, reporter_id, reason, reported_at)
+                       VALUES (%s, %s, %s, UTC_TIMESTAMP())""",
+                    (report_id, reporter_id, reason))
+                if not created and cursor.rowcount == 1:
+                    cursor.execute("UPDATE reports SET report_count = report_count + 1 WHERE id = %s", (report_id,))
+                if reopened:
+                    cursor.execute("UPDATE reports SET status = 'open', handled_by = NULL WHERE id = %s", (report_id,))
+
+                cursor.execute("SELECT report_count FROM reports WHERE id = %s", (report_id,))
+                report_count = cursor.fetchone()[0]
+                connection.commit()
+                return report_id, report_count, created, reopened
+        except Error as e:
+            logging.error(f"Database error while storing report: {e}")
+            return None
+
 @bot.command()
 async def report(ctx, message_or_user: str = None, *, reason: str = None):
     """
@@ -511,10 +1951,27 @@ async def report(ctx, message_or_user: str = None, *, reason: str = None):
         await ctx.send("Please provide a reason for the report.")
         return
 
-    # Here you would typically send this information to a designated channel or store it in a database
+    if reported_msg:
+        stored = await run_db(store_report, ctx.author.id, user.id, user.name, reason, reported_msg.id,
+                              reported_msg.channel.id, reported_msg.jump_url, reported_msg.content)
+    else:
+        stored = await run_db(store_report, ctx.author.id, user.id, user.name, reason)
+
+    if stored is None:
+        await ctx.send("Sorry, your report couldn't be saved. Please try again later.")
+        return
+
+    report_id, report_count, created, reopened = stored
+    if not created and not reopened:
+        # Already in the queue; staff see the updated count in /reports
+        logging.info(f"Report #{report_id} on message {reported_msg.id} now has {report_count} reports", extra={'sample': True})
+        await ctx.send("Thank you for your report. This message has already been reported and is queued for review.")
+        return
+
     report_channel = bot.get_channel(REPORT_CHANNEL_ID)
     
-    embed = discord.Embed(title="New Report", color=discord.Color.red())
+    title = f"Reopened Report #{report_id} ({report_count} reports)" if reopened else f"New Report #{report_id}"
+    embed = discord.Embed(title=title, color=discord.Color.red())
     embed.add_field(name="Reported User", value=f"{user.name}#{user.discriminator} (ID: {user.id})", inline=False)
     embed.add_field(name="Reported By", value=f"{ctx.author.name}#{ctx.author.discriminator} (ID: {ctx.author.id})", inline=False)
     
@@ -530,19 +1987,61 @@ async def report(ctx, message_or_user: str = None, *, reason: str = None):
     embed.add_field(name="Report Source", value="DM" if isinstance(ctx.channel, discord.DMChannel) else "Server Channel", inline=False)
     embed.add_field(name="Server", value=guild.name, inline=False)
 
-    await report_channel.send(embed=embed)
+    await outbound.send(report_channel, embed=embed, priority=SEND_PRIORITY_MODERATION)
     await ctx.send("Thank you for your report. It has been submitted for review.")
 
+# Recently seen message id -> channel id, so reports by message ID usually
+# resolve with a single fetch instead of probing every channel.
+MESSAGE_INDEX_SIZE = int(os.getenv('MESSAGE_INDEX_SIZE', 100000))
+MESSAGE_SEARCH_CONCURRENCY = int(os.getenv('MESSAGE_SEARCH_CONCURRENCY', 5))
+message_channel_index = OrderedDict()
+
+def index_message_channel(message_id, channel_id):
+    message_channel_index[message_id] = channel_id
+    if len(message_channel_index) > MESSAGE_INDEX_SIZE:
+        message_channel_index.popitem(last=False)
+
+@bot.listen('on_message')
+async def index_message(message):
+    if message.guild is not None:
+        index_message_channel(message.id, message.channel.id)
+
 async def find_message_by_id(guild, message_id):
     """
     Search for a message by its ID in all channels of the given server.
+    Indexed messages are fetched directly; otherwise readable channels are
+    searched concurrently and the first hit wins.
     """
-    for channel in guild.text_channels:
-        try:
-            message = await channel.fetch_message(message_id)
-            return message
-        except discord.NotFound:
-            continue
+    indexed_channel_id = message_channel_index.get(message_id)
+    if indexed_channel_id is not None:
+        channel = guild.get_channel_or_thread(indexed_channel_id)
+        if channel is not None:
+            try:
+                return await channel.fetch_message(message_id)
+            except discord.HTTPException:
+                pass
+
+    channels = [channel for channel in guild.text_channels
+                if channel.id != indexed_channel_id and channel.permissions_for(guild.me).read_message_history]
+    slots = asyncio.Semaphore(MESSAGE_SEARCH_CONCURRENCY)
+
+    async def fetch(channel):
+        async with slots:
+            try:
+                return await channel.fetch_message(message_id)
+            except discord.HTTPException:
+                return None
+
+    searches = [asyncio.create_task(fetch(channel)) for channel in channels]
+    try:
+        for search in asyncio.as_completed(searches):
+            message = await search
+            if message is not None:
+                index_message_channel(message.id, message.channel.id)
+                return message
+    finally:
+        for search in searches:
+            search.cancel()
     return None
 
 @bot.tree.command(name="report_help", description="Get information on how to report anonymously")
@@ -564,41 +2063,277 @@ async def report_help(interaction: discord.Interaction):
         "Remember, all reports are confidential and anonymous when sent via DM."
     )
 
+    # The outbound queue may hold the DM past the 3 second response window
+    await interaction.response.defer(ephemeral=True)
     try:
-        await interaction.user.send(instructions)
-        await interaction.response.send_message("Instructions have been sent to your DMs.", ephemeral=True)
+        await outbound.send(interaction.user, instructions)
+        await interaction.followup.send("Instructions have been sent to your DMs.", ephemeral=True)
     except discord.Forbidden:
-        await interaction.response.send_message("I couldn't send you a DM. Please check your privacy settings and try again.", ephemeral=True)
+        await interaction.followup.send("I couldn't send you a DM. Please check your privacy settings and try again.", ephemeral=True)
+
+async def fetch_report_page(status, user_id=None, after=None, before=None, limit=REPORT_PAGE_SIZE):
+    """Fetch a page of reports, newest first, using keyset pagination on id."""
+    conditions, params = ["status = %s"], [status]
+    if user_id is not None:
+        conditions.append("reported_user_id = %s")
+        params.append(user_id)
+    if after is not None:
+        conditions.append("id < %s")
+        params.append(after)
+    if before is not None:
+        conditions.append("id > %s")
+        params.append(before)
+
+    order = "ASC" if before is not None else "DESC"
+    query = f"""SELECT id, reported_user_id, reported_user_name, jump_url, reason, report_count, created_at
+                FROM reports WHERE {' AND '.join(conditions)} ORDER BY id {order} LIMIT %s"""
+    params.append(limit)
+
+    results = await db_query(query, tuple(params))
+    if results is not None and before is not None:
+        results.reverse()
+    return results
+
+@bot.tree.command(name="reports", description="Browse the report queue")
+@app_commands.describe(status="Which reports to show", user="Only show reports about this user")
+@app_commands.choices(status=[app_commands.Choice(name=status.title(), value=status) for status in REPORT_STATUSES])
+@app_commands.checks.has_any_role('NeoPunkFM', 'NPFM Affiliate', 'Neo-Engineer')
+async def reports(interaction: discord.Interaction, status: str = 'open', user: discord.User = None):
+    """Page through stored reports, newest first."""
+    user_id = user.id if user else None
+    if user_id is None:
+        count = await db_query("SELECT COUNT(*) AS total FROM reports WHERE status = %s", (status,))
+    else:
+        count = await db_query("SELECT COUNT(*) AS total FROM reports WHERE reported_user_id = %s AND status = %s",
+                               (user_id, status))
+
+    if count is None:
+        await interaction.response.send_message("Failed to retrieve reports. Please try again later.", ephemeral=True)
+        return
+
+    total = count[0]['total']
+    if not total:
+        await interaction.response.send_message(f"No {status} reports.", ephemeral=True)
+        return
+
+    title = f"{status.title()} Reports" if user is None else f"{status.title()} Reports about {user.name}"
+    pages = -(-total // REPORT_PAGE_SIZE)
+
+    def render(rows, page):
+        embed = discord.Embed(title=title, color=discord.Color.red())
+        lines = []
+        for row in rows:
+            line = f"**#{row['id']}** {row['reported_user_name']} (ID: {row['reported_user_id']})"
+            if row['report_count'] > 1:
+                line += f" ×{row['report_count']}"
+            line += f" — {row['reason'][:100]}"
+            if row['jump_url']:
+                line += f" [message]({row['jump_url']})"
+            lines.append(line)
+        embed.description = "\n".join(lines)
+        embed.set_footer(text=f"Page {page + 1}/{pages} | Total {status} reports: {total}")
+        return embed
+
+    async def fetch_page(after, before, limit):
+        return await fetch_report_page(status, user_id, after=after, before=before, limit=limit)
+
+    view = KeysetPageView(interaction.user.id, fetch_page, lambda row: row['id'], render, REPORT_PAGE_SIZE)
+    embed = await view.load_first_page()
+    if embed is None:
+        await interaction.response.send_message("Failed to retrieve reports. Please try again later.", ephemeral=True)
+        return
+
+    await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+    view.message = await interaction.original_response()
+
+@bot.tree.command(name="report_status", description="Move a report to a different triage state")
+@app_commands.describe(report_id="The report number", status="The new status")
+@app_commands.choices(status=[app_commands.Choice(name=status.title(), value=status) for status in REPORT_STATUSES])
+@app_commands.checks.has_any_role('NeoPunkFM', 'NPFM Affiliate', 'Neo-Engineer')
+async def report_status(interaction: discord.Interaction, report_id: int, status: str):
+    """Set the triage status of a report."""
+    updated = await db_query(
+        "UPDATE reports SET status = %s, handled_by = %s, updated_at = UTC_TIMESTAMP() WHERE id = %s",
+        (status, interaction.user.id, report_id))
+
+    if updated is None:
+        await interaction.response.send_message("Failed to update the report. Please try again later.", ephemeral=True)
+    elif updated == 0:
+        await interaction.response.send_message(f"Report #{report_id} doesn't exist or is already {status}.", ephemeral=True)
+    else:
+        logging.info(f"Report #{report_id} marked {status} by {interaction.user.id}")
+        await interaction.response.send_message(f"Report #{report_id} marked as {status}.", ephemeral=True)
 
 @bot.event
 async def on_ready():
-    print(f'{bot.user} has connected to Discord!')
+    logging.info(f'{bot.user} has connected to Discord!')
 
 @bot.command(name="remove_ua", description="Remove a user from the underage database.")
 @commands.has_permissions(administrator=True)  # Optional: restrict to admins
 async def remove_ua(ctx, user: discord.User):
     """Remove a user from the underage_users database."""
-    connection = create_db_connection()
-    if connection is None:
-        await ctx.send("Failed to connect to the database.")
+    result = await remove_underage_user(user.id)
+    member = ctx.guild.get_member(user.id) if ctx.guild else None
+    if member is not None and result is not None:
+        await age_gate.apply(member, False, clear_overwrites=result > 0)
+    if result is None:
+        await ctx.send("An error occurred while trying to remove the user.")
+    elif result > 0:
+        await ctx.send(f"User {user.name} has been removed from the underage database.")
+    else:
+        await ctx.send(f"User {user.name} was not found in the underage database.")
+
+# Reconciliation between underage_users and the guild. Drift creeps in when a
+# role is removed by hand, a write fails or a member leaves, so the table is
+# streamed in keyset chunks, compared with the cached member list, and the
+# differences are fixed under a rate budget.
+RECONCILE_INTERVAL = float(os.getenv('RECONCILE_INTERVAL', 6 * 3600))
+RECONCILE_CHUNK_SIZE = int(os.getenv('RECONCILE_CHUNK_SIZE', 1000))
+RECONCILE_FIX_RATE = float(os.getenv('RECONCILE_FIX_RATE', 2))  # Role changes per second
+RECONCILE_PRUNE_DEPARTED = os.getenv('RECONCILE_PRUNE_DEPARTED', '').strip().lower() in ('1', 'true', 'yes')  # Delete rows of members who left
+
+reconcile_lock = asyncio.Lock()
+last_reconcile = {}
+
+async def stream_underage_users(chunk_size):
+    """Yield underage_users rows in id order, chunk_size rows per query."""
+    after = 0
+    while True:
+        rows = await db_query("SELECT id, name FROM underage_users WHERE id > %s ORDER BY id LIMIT %s",
+                              (after, chunk_size))
+        if rows is None:
+            raise Error("Failed to read underage_users")
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+        after = rows[-1]['id']
+
+async def reconcile_underage(guild):
+    """Bring the underage role in line with underage_users. Returns the drift counts."""
+    async with reconcile_lock:
+        started = time.monotonic()
+        if not guild.chunked:
+            await guild.chunk()
+        role = await age_gate.get_role(guild)
+        with_role = {member.id for member in role.members}
+
+        listed = set()
+        missing_role, departed, renamed = [], [], []
+        async for rows in stream_underage_users(RECONCILE_CHUNK_SIZE):
+            for row in rows:
+                user_id = int(row['id'])
+                listed.add(user_id)
+                underage_cache.set(user_id, True)
+                member = guild.get_member(user_id)
+                if member is None:
+                    departed.append(user_id)
+                    continue
+                if user_id not in with_role:
+                    missing_role.append(member)
+                if member.name != row['name']:
+                    renamed.append((member.name, user_id))
+        unlisted = with_role - listed
+
+        counts = defaultdict(int, checked=len(listed), missing_role=len(missing_role), departed=len(departed),
+                             renamed=len(renamed), unlisted_role=len(unlisted))
+
+        budget = TokenBucket(RECONCILE_FIX_RATE, max(1, RECONCILE_FIX_RATE))
+        for member in missing_role:
+            while (wait := budget.delay()) > 0:
+                await asyncio.sleep(wait)
+            budget.take()
+            try:
+                await member.add_roles(role, reason="Recorded as underage")
+                counts['roles_added'] += 1
+            except discord.HTTPException as e:
+                counts['fix_failed'] += 1
+                logging.warning(f"Failed to restore underage role for {member.id}: {e}")
+
+        if renamed and await db_query_many("UPDATE underage_users SET name = %s WHERE id = %s", renamed) is None:
+            counts['fix_failed'] += len(renamed)
+        if departed and RECONCILE_PRUNE_DEPARTED:
+            for start in range(0, len(departed), RECONCILE_CHUNK_SIZE):
+                chunk = departed[start:start + RECONCILE_CHUNK_SIZE]
+                if await db_query_many("DELETE FROM underage_users WHERE id = %s", [(user_id,) for user_id in chunk]) is None:
+                    counts['fix_failed'] += len(chunk)
+                    continue
+                counts['pruned'] += len(chunk)
+                for user_id in chunk:
+                    underage_cache.invalidate(user_id)
+        if unlisted:
+            # Not removed automatically: the role may be right and the record missing
+            logging.warning(f"{len(unlisted)} members have the underage role without a record, e.g. {sorted(unlisted)[:10]}")
+
+        counts['seconds'] = round(time.monotonic() - started, 1)
+        last_reconcile.clear()
+        last_reconcile.update(counts)
+        logging.info(f"Underage reconciliation for guild {guild.id}: {dict(counts)}")
+        return counts
+
+async def reconcile_periodically():
+    await bot.wait_until_ready()
+    while True:
+        guild = bot.get_guild(GUILD_ID)
+        if guild is None:
+            logging.warning(f"Skipping underage reconciliation: guild {GUILD_ID} not found")
+        else:
+            try:
+                await reconcile_underage(guild)
+            except Exception as e:
+                logging.error(f"Underage reconciliation failed: {e}")
+        await asyncio.sleep(RECONCILE_INTERVAL)
+
+@bot.command(name="reconcile")
+@commands.has_permissions(administrator=True)
+@commands.guild_only()
+async def reconcile(ctx):
+    """Run the underage reconciliation now and show the drift it found."""
+    if reconcile_lock.locked():
+        await ctx.send("A reconciliation is already running.")
         return
-
+    await ctx.send("Reconciling underage records with the server...")
     try:
-        cursor = connection.cursor()
-        cursor.execute("DELETE FROM underage_users WHERE id = %s", (str(user.id),))
-        connection.commit()
-
-        if cursor.rowcount > 0:
-            await ctx.send(f"User {user.name} has been removed from the underage database.")
-        else:
-            await ctx.send(f"User {user.name} was not found in the underage database.")
+        counts = await reconcile_underage(ctx.guild)
+    except Exception as e:
+        await ctx.send(handle_error(e, "during underage reconciliation"))
+        return
+    lines = "\n".join(f"{name}: {value}" for name, value in sorted(counts.items()))
+    await ctx.send(f"```\n{lines}\n```")
+
+@bot.command(name="migrate_age_gate")
+@commands.has_permissions(administrator=True)
+@commands.guild_only()
+async def migrate_age_gate(ctx):
+    """Convert per-member age overwrites on gated channels into the underage role."""
+    await ctx.send("Migrating age restrictions to the underage role...")
+    try:
+        underage_ids = {int(row['id']) async for rows in stream_underage_users(RECONCILE_CHUNK_SIZE) for row in rows}
+        assigned, removed = await age_gate.migrate(ctx.guild, underage_ids)
+    except (Error, discord.HTTPException) as e:
+        await ctx.send(handle_error(e, "while migrating age overwrites"))
+        return
+    await ctx.send(f"Done: {assigned} members given the underage role, {removed} channel overwrites removed.")
 
-    except Error as e:
-        logging.error(f"Error removing user from underage database: {e}")
-        await ctx.send("An error occurred while trying to remove the user.")
-    finally:
-        cursor.close()
-        connection.close()
+@bot.command(name="dbstats")
+@commands.is_owner()
+async def dbstats(ctx):
+    """Show database connection pool, dispatch and cache statistics."""
+    stats = db_pool.stats()
+    stats.update({f"dispatch_{name}": round(value, 4) for name, value in db_dispatch_stats.items()})
+    stats.update({f"cache_{name}": value for name, value in underage_cache.stats().items()})
+    lines = "\n".join(f"{name}: {value}" for name, value in sorted(stats.items()))
+    await ctx.send(f"```\n{lines}\n```")
+
+@bot.command(name="sendstats")
+@commands.is_owner()
+async def sendstats(ctx):
+    """Show outbound message queue statistics."""
+    stats = outbound.stats()
+    if stats.get('sent'):
+        stats['wait_seconds_avg'] = stats['wait_seconds_total'] / (stats['sent'] + stats.get('failed', 0))
+    lines = "\n".join(f"{name}: {round(value, 4)}" for name, value in sorted(stats.items()))
+    await ctx.send(f"```\n{lines}\n```")
 
 @bot.tree.command(name="suggest", description="Submit a suggestion.")
 @app_commands.describe(
@@ -626,9 +2361,9 @@ async def suggest(interaction: discord.Interaction, category: str, *, suggestion
     # Send the embed to the specified suggestions channel
     suggestions_channel = bot.get_channel(SUGGESTIONS_CHANNEL_ID)  # Use the loaded channel ID
     if suggestions_channel:
-        await suggestions_channel.send(embed=embed)
         await interaction.response.send_message("Thank you for your suggestion!", ephemeral=True)
+        await outbound.send(suggestions_channel, embed=embed)
     else:
         await interaction.response.send_message("Suggestion channel not found. Please contact an administrator.", ephemeral=True)
 
-bot.run(BOT_TOKEN)
+bot.run(BOT_TOKEN, log_handler=None)
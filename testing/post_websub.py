@@ -0,0 +1,57 @@
+import argparse
+import hashlib
+import hmac
+import os
+import urllib.request
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+# Replays testing/websub_feed.xml against the bot's WebSub receiver, signed the
+# way YouTube's hub signs it. The channel and video ids can be swapped in, and
+# the dates are moved to now so the bot doesn't drop the entry as an old edit.
+load_dotenv()
+
+ATOM = 'http://www.w3.org/2005/Atom'
+YT = 'http://www.youtube.com/xml/schemas/2015'
+ET.register_namespace('', ATOM)
+ET.register_namespace('yt', YT)
+
+def build_payload(path, channel_id=None, video_id=None, keep_dates=False):
+    tree = ET.parse(path)
+    now = datetime.now(timezone.utc).isoformat()
+    for entry in tree.getroot().iter(f'{{{ATOM}}}entry'):
+        if channel_id:
+            entry.find(f'{{{YT}}}channelId').text = channel_id
+        if video_id:
+            entry.find(f'{{{YT}}}videoId').text = video_id
+            entry.find(f'{{{ATOM}}}id').text = f'yt:video:{video_id}'
+        if not keep_dates:
+            entry.find(f'{{{ATOM}}}published').text = now
+            entry.find(f'{{{ATOM}}}updated').text = now
+    return ET.tostring(tree.getroot(), encoding='utf-8', xml_declaration=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="POST a signed WebSub notification to the bot")
+    parser.add_argument('--url', default=f"http://127.0.0.1:{os.getenv('WEBSUB_PORT', 8080)}/websub")
+    parser.add_argument('--feed', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'websub_feed.xml'))
+    parser.add_argument('--channel-id', default=os.getenv('YOUTUBE_CHANNEL_ID'))
+    parser.add_argument('--video-id')
+    parser.add_argument('--secret', default=os.getenv('WEBSUB_SECRET'))
+    parser.add_argument('--keep-dates', action='store_true', help="send the recorded published/updated dates")
+    args = parser.parse_args()
+
+    if not args.secret:
+        parser.error("Set WEBSUB_SECRET (the bot's secret) or pass --secret")
+
+    body = build_payload(args.feed, args.channel_id, args.video_id, args.keep_dates)
+    signature = hmac.new(args.secret.encode(), body, hashlib.sha1).hexdigest()
+    request = urllib.request.Request(args.url, data=body, method='POST', headers={
+        'Content-Type': 'application/atom+xml',
+        'X-Hub-Signature': f'sha1={signature}',
+    })
+    with urllib.request.urlopen(request) as response:
+        print(f"{response.status} {response.reason}")
+
+if __name__ == '__main__':
+    main()